@@ -1,112 +1,354 @@
 #!/usr/bin/env python3
 """Build static HTML site from .md article files using Jinja2 templates."""
 
+import hashlib
+import os
 import shutil
+import sqlite3
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
 import frontmatter
-from jinja2 import Environment, FileSystemLoader
+import orjson
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 
 ROOT = Path(__file__).resolve().parent.parent
 CONTENT_DIR = ROOT / "content" / "articles"
 TEMPLATES_DIR = ROOT / "templates"
 STATIC_DIR = ROOT / "static"
 OUTPUT_DIR = ROOT / "_site"
+CACHE_DIR = ROOT / "_site_cache"
+ARTICLE_STORE_FILE = CACHE_DIR / "articles.db"
+# Bump when the articles table changes; older stores are rebuilt
+ARTICLE_STORE_VERSION = 2
+RENDER_MANIFEST_FILE = CACHE_DIR / "render_manifest.json"
+# orjson options for serializing page contexts before hashing them
+HASH_JSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+JINJA_CACHE_DIR = CACHE_DIR / "jinja"
+# Below this many stale article pages, worker startup costs more than it saves
+PARALLEL_RENDER_MIN = 500
+RENDER_CHUNKSIZE = 64
+
+# Every article uses YAML frontmatter, so skip per-file format detection.
+# python-frontmatter's YAMLHandler parses with libyaml's CSafeLoader
+# whenever PyYAML was built with it.
+YAML_HANDLER = frontmatter.YAMLHandler()
 
 SITE_URL = "https://elloloop.github.io/ai-news"
 SITE_TITLE = "AI News"
 SITE_DESCRIPTION = "Curated AI and machine learning news from top sources"
 
 
+def open_article_store():
+    """Open the SQLite store of parsed articles, keyed by markdown path.
+
+    The markdown files stay the source of truth; each row records the
+    file's mtime and size so unchanged files are never re-parsed.
+    """
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(ARTICLE_STORE_FILE)
+    conn.execute("PRAGMA journal_mode=WAL")
+    if conn.execute("PRAGMA user_version").fetchone()[0] != ARTICLE_STORE_VERSION:
+        conn.execute("DROP TABLE IF EXISTS articles")
+        conn.execute(f"PRAGMA user_version = {ARTICLE_STORE_VERSION}")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS articles ("
+        "path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, "
+        "date TEXT NOT NULL, month TEXT NOT NULL, data BLOB NOT NULL)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS articles_date ON articles (date)")
+    return conn
+
+
+def month_key(date_str):
+    try:
+        dt = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+        return dt.strftime("%B %Y")
+    except Exception:
+        return "Unknown"
+
+
 def load_articles():
-    articles = []
-    for md_file in sorted(CONTENT_DIR.glob("*.md"), reverse=True):
+    """Return all articles, newest first.
+
+    Each article carries its archive month under "_month", computed once
+    when the file is parsed.
+    """
+    conn = open_article_store()
+    try:
+        stored = {
+            path: (mtime_ns, size)
+            for path, mtime_ns, size in conn.execute(
+                "SELECT path, mtime_ns, size FROM articles"
+            )
+        }
+        current = set()
+        changed = []
+        # Order doesn't matter here; the query below sorts by date
         try:
-            post = frontmatter.load(md_file)
-            article = dict(post.metadata)
-            article["body"] = post.content
+            with os.scandir(CONTENT_DIR) as it:
+                entries = [e for e in it if e.name.endswith(".md") and e.is_file()]
+        except FileNotFoundError:
+            # No articles fetched yet; build an empty site
+            entries = []
+        for entry in entries:
+            try:
+                st = entry.stat()
+                key = entry.path
+                if stored.get(key) != (st.st_mtime_ns, st.st_size):
+                    post = frontmatter.load(entry.path, handler=YAML_HANDLER)
+                    article = dict(post.metadata)
+                    article["body"] = post.content
+                    date_str = str(article.get("date", ""))
+                    changed.append(
+                        (
+                            key,
+                            st.st_mtime_ns,
+                            st.st_size,
+                            date_str,
+                            month_key(date_str),
+                            orjson.dumps(article, default=str),
+                        )
+                    )
+                current.add(key)
+            except Exception as e:
+                print(f"  Skipping {entry.name}: {e}")
+        removed = [(path,) for path in stored if path not in current]
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?, ?)", changed
+            )
+            conn.executemany("DELETE FROM articles WHERE path = ?", removed)
+        print(f"Parsed {len(changed)} changed article files")
+        # Sort by date descending; path breaks ties like the filename order did
+        articles = []
+        for month, data in conn.execute(
+            "SELECT month, data FROM articles ORDER BY date DESC, path DESC"
+        ):
+            article = orjson.loads(data)
+            article["_month"] = month
             articles.append(article)
-        except Exception as e:
-            print(f"  Skipping {md_file.name}: {e}")
-    # Sort by date descending
-    articles.sort(key=lambda a: a.get("date", ""), reverse=True)
+    finally:
+        conn.close()
     return articles
 
 
+def load_render_manifest():
+    """Return the stored output path -> content hash mapping."""
+    try:
+        return orjson.loads(RENDER_MANIFEST_FILE.read_bytes())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_render_manifest(manifest):
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    RENDER_MANIFEST_FILE.write_bytes(
+        orjson.dumps(manifest, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+    )
+
+
+def templates_fingerprint(site_globals):
+    """Hash every template plus the globals they render.
+
+    Templates only show the build date, so the time of day is left out;
+    otherwise every build would invalidate every page.
+    """
+    h = hashlib.sha1()
+    for tmpl_file in sorted(TEMPLATES_DIR.rglob("*.html")):
+        h.update(tmpl_file.name.encode())
+        h.update(tmpl_file.read_bytes())
+    fingerprint_globals = dict(site_globals, now=site_globals["now"][:10])
+    h.update(orjson.dumps(fingerprint_globals, option=orjson.OPT_SORT_KEYS))
+    return h.hexdigest()
+
+
+def write_page(template, out_path, **context):
+    """Stream the rendered template to out_path as UTF-8 bytes."""
+    with open(out_path, "wb", buffering=1 << 16) as f:
+        template.stream(**context).dump(f, encoding="utf-8")
+
+
+class PageRenderer:
+    """Render pages whose template or context changed since the last build."""
+
+    def __init__(self, fingerprint, manifest):
+        self.fingerprint = fingerprint
+        self.manifest = manifest
+        self.new_manifest = {}
+
+    def is_stale(self, out_path, **context):
+        """Record the page's hash and return True if it must be rendered."""
+        key = out_path.relative_to(OUTPUT_DIR).as_posix()
+        payload = orjson.dumps(context, default=str, option=HASH_JSON_OPTIONS)
+        digest = hashlib.sha1(self.fingerprint.encode() + payload).hexdigest()
+        self.new_manifest[key] = digest
+        return self.manifest.get(key) != digest or not out_path.exists()
+
+    def render(self, template, out_path, **context):
+        if not self.is_stale(out_path, **context):
+            return False
+        write_page(template, out_path, **context)
+        return True
+
+
+def sync_static(src, dst):
+    """Mirror src into dst, copying only files whose mtime or size differ."""
+    copied = 0
+    wanted = set()
+    for src_file in src.rglob("*"):
+        if not src_file.is_file():
+            continue
+        rel = src_file.relative_to(src)
+        wanted.add(rel)
+        dst_file = dst / rel
+        src_st = src_file.stat()
+        try:
+            dst_st = dst_file.stat()
+            if (dst_st.st_mtime_ns, dst_st.st_size) == (
+                src_st.st_mtime_ns,
+                src_st.st_size,
+            ):
+                continue
+        except FileNotFoundError:
+            dst_file.parent.mkdir(parents=True, exist_ok=True)
+        # copy2 keeps the mtime, so the next build sees the file as unchanged
+        shutil.copy2(src_file, dst_file)
+        copied += 1
+    if dst.exists():
+        for dst_file in dst.rglob("*"):
+            if dst_file.is_file() and dst_file.relative_to(dst) not in wanted:
+                dst_file.unlink()
+    return copied
+
+
+def make_environment(site_globals):
+    # Compiled templates are reused across builds; templates don't change
+    # while a build runs, so skip the per-lookup mtime check too
+    JINJA_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    env = Environment(
+        loader=FileSystemLoader(str(TEMPLATES_DIR)),
+        autoescape=True,
+        bytecode_cache=FileSystemBytecodeCache(str(JINJA_CACHE_DIR)),
+        auto_reload=False,
+    )
+    env.globals.update(site_globals)
+    return env
+
+
+# Per-process article template, set up by _init_render_worker
+_worker_article_tmpl = None
+
+
+def _init_render_worker(site_globals):
+    global _worker_article_tmpl
+    _worker_article_tmpl = make_environment(site_globals).get_template("article.html")
+
+
+def _render_article_page(article, out_path):
+    write_page(_worker_article_tmpl, out_path, article=article)
+
+
+def render_article_pages(site_globals, jobs):
+    """Render (article, out_path) pairs, across processes for large batches."""
+    if len(jobs) < PARALLEL_RENDER_MIN or (os.cpu_count() or 1) < 2:
+        _init_render_worker(site_globals)
+        for article, out_path in jobs:
+            _render_article_page(article, out_path)
+        return
+    with ProcessPoolExecutor(
+        initializer=_init_render_worker, initargs=(site_globals,)
+    ) as ex:
+        articles, out_paths = zip(*jobs)
+        # Consume the results so worker exceptions propagate
+        for _ in ex.map(
+            _render_article_page, articles, out_paths, chunksize=RENDER_CHUNKSIZE
+        ):
+            pass
+
+
 def build_site():
-    env = Environment(loader=FileSystemLoader(str(TEMPLATES_DIR)), autoescape=True)
-    env.globals["site_url"] = SITE_URL
-    env.globals["site_title"] = SITE_TITLE
-    env.globals["site_description"] = SITE_DESCRIPTION
-    env.globals["now"] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    site_globals = {
+        "site_url": SITE_URL,
+        "site_title": SITE_TITLE,
+        "site_description": SITE_DESCRIPTION,
+        "now": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+    env = make_environment(site_globals)
 
     articles = load_articles()
     print(f"Loaded {len(articles)} articles")
 
-    # Clean and create output dir
-    if OUTPUT_DIR.exists():
-        shutil.rmtree(OUTPUT_DIR)
-    OUTPUT_DIR.mkdir(parents=True)
+    # Output is updated in place; unchanged pages are left untouched
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    renderer = PageRenderer(templates_fingerprint(site_globals), load_render_manifest())
 
     # Copy static assets
     static_out = OUTPUT_DIR / "static"
     if STATIC_DIR.exists():
-        shutil.copytree(STATIC_DIR, static_out)
+        copied = sync_static(STATIC_DIR, static_out)
+        if copied:
+            print(f"Copied: {copied} static files")
 
-    # Group articles by category
-    categories = {}
+    # Group articles by category and by month in one pass
+    categories = defaultdict(list)
+    months = defaultdict(list)
     for article in articles:
-        cat = article.get("category", "general")
-        categories.setdefault(cat, []).append(article)
+        categories[article.get("category", "general")].append(article)
+        months[article["_month"]].append(article)
 
     # Build index (latest 30 articles)
     index_tmpl = env.get_template("index.html")
-    index_html = index_tmpl.render(articles=articles[:30], categories=categories)
-    (OUTPUT_DIR / "index.html").write_text(index_html)
-    print("Built: index.html")
+    if renderer.render(
+        index_tmpl,
+        OUTPUT_DIR / "index.html",
+        articles=articles[:30],
+        # The index only lists category names
+        categories=dict.fromkeys(categories),
+    ):
+        print("Built: index.html")
 
     # Build individual article pages
-    article_tmpl = env.get_template("article.html")
     articles_out = OUTPUT_DIR / "article"
-    articles_out.mkdir()
+    articles_out.mkdir(exist_ok=True)
+    page_names = set()
+    jobs = []
     for article in articles:
-        html = article_tmpl.render(article=article)
         slug = article.get("slug", "untitled")
-        (articles_out / f"{slug}.html").write_text(html)
-    print(f"Built: {len(articles)} article pages")
+        page_names.add(f"{slug}.html")
+        out_path = articles_out / f"{slug}.html"
+        if renderer.is_stale(out_path, article=article):
+            jobs.append((article, out_path))
+    render_article_pages(site_globals, jobs)
+    print(f"Built: {len(jobs)} of {len(articles)} article pages")
+
+    # Remove pages for articles that no longer exist
+    for page in articles_out.glob("*.html"):
+        if page.name not in page_names:
+            page.unlink()
+            print(f"Removed: article/{page.name}")
 
     # Build archive page
     archive_tmpl = env.get_template("archive.html")
-    # Group by month
-    months = {}
-    for article in articles:
-        date_str = article.get("date", "")
-        try:
-            dt = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-            month_key = dt.strftime("%B %Y")
-        except Exception:
-            month_key = "Unknown"
-        months.setdefault(month_key, []).append(article)
-    archive_html = archive_tmpl.render(months=months, total=len(articles))
-    (OUTPUT_DIR / "archive.html").write_text(archive_html)
-    print("Built: archive.html")
-
-    # Generate sitemap.xml
-    sitemap_entries = [{"url": SITE_URL + "/", "priority": "1.0"}]
-    sitemap_entries.append({"url": SITE_URL + "/archive.html", "priority": "0.8"})
-    for article in articles:
-        slug = article.get("slug", "")
-        sitemap_entries.append(
-            {"url": f"{SITE_URL}/article/{slug}.html", "priority": "0.6"}
+    if renderer.render(
+        archive_tmpl, OUTPUT_DIR / "archive.html", months=months, total=len(articles)
+    ):
+        print("Built: archive.html")
+
+    # Generate sitemap.xml, streamed straight to disk
+    url_entry = "  <url>\n    <loc>{}</loc>\n    <priority>{}</priority>\n  </url>\n"
+    with open(OUTPUT_DIR / "sitemap.xml", "w", buffering=1 << 20) as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        f.write(url_entry.format(SITE_URL + "/", "1.0"))
+        f.write(url_entry.format(SITE_URL + "/archive.html", "0.8"))
+        f.writelines(
+            url_entry.format(f"{SITE_URL}/article/{article.get('slug', '')}.html", "0.6")
+            for article in articles
         )
-    sitemap_xml = '<?xml version="1.0" encoding="UTF-8"?>\n'
-    sitemap_xml += '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-    for entry in sitemap_entries:
-        sitemap_xml += f'  <url>\n    <loc>{entry["url"]}</loc>\n'
-        sitemap_xml += f'    <priority>{entry["priority"]}</priority>\n  </url>\n'
-    sitemap_xml += "</urlset>\n"
-    (OUTPUT_DIR / "sitemap.xml").write_text(sitemap_xml)
+        f.write("</urlset>\n")
     print("Built: sitemap.xml")
 
     # Generate robots.txt
@@ -114,6 +356,8 @@ def build_site():
     (OUTPUT_DIR / "robots.txt").write_text(robots)
     print("Built: robots.txt")
 
+    save_render_manifest(renderer.new_manifest)
+
     print(f"\nSite built to {OUTPUT_DIR}")
 
 
@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
 """Fetch RSS feeds and write articles as .md files with frontmatter."""
 
+import argparse
+import asyncio
 import hashlib
 import os
 import re
+import sqlite3
 import ssl
 import sys
+import threading
+import time
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 from html import unescape
 from pathlib import Path
@@ -14,8 +20,11 @@ from pathlib import Path
 import certifi
 import feedparser
 import frontmatter
+import orjson
+import requests
 import yaml
 from dateutil import parser as dateparser
+from requests.adapters import HTTPAdapter
 
 # Fix SSL certificate verification
 if hasattr(ssl, "_create_default_https_context"):
@@ -26,46 +35,107 @@ if hasattr(ssl, "_create_default_https_context"):
 # Optional: Claude API for summarization
 try:
     import anthropic
+    import httpx
 
     HAS_ANTHROPIC = True
 except ImportError:
     HAS_ANTHROPIC = False
 
+# Optional: HTTP/2 lets concurrent summary requests share one connection;
+# httpx needs the h2 package for it
+try:
+    import h2  # noqa: F401
+
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+
 ROOT = Path(__file__).resolve().parent.parent
 CONTENT_DIR = ROOT / "content" / "articles"
 FEEDS_FILE = ROOT / "feeds.yml"
+FEED_CACHE_FILE = ROOT / "content" / ".feed_cache.json"
+SUMMARY_CACHE_FILE = ROOT / "content" / ".summary_cache.sqlite"
+URL_INDEX_FILE = ROOT / "content" / ".url_index.txt"
+# libyaml-backed parser when PyYAML was built with it; frontmatter's
+# YAMLHandler makes the same choice for article files
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_HANDLER = frontmatter.YAMLHandler()
+
+MAX_FETCH_WORKERS = 16
+FETCH_TIMEOUT = 15
+SUMMARY_CONCURRENCY = 8
+# Full descriptions in this length range with few sentences already read
+# as a summary and are used as-is
+SUMMARY_MIN_CHARS = 80
+SUMMARY_MAX_CHARS = 280
+SUMMARY_MAX_SENTENCES = 4
+SUMMARY_MODEL = "claude-sonnet-4-5-20250514"
+# Bump whenever the summary prompt changes so cached summaries are redone
+PROMPT_VERSION = 1
+
+# One pooled session shared by all fetch workers so connections are reused
+SESSION = requests.Session()
+SESSION.headers["User-Agent"] = feedparser.USER_AGENT
+SESSION.headers["Accept"] = feedparser.http.ACCEPT_HEADER
+SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
+SESSION.mount("http://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
+
+_RE_NONWORD = re.compile(r"[^\w\s-]")
+_RE_DASH = re.compile(r"[-\s]+")
+_RE_TAG = re.compile(r"<[^>]+>")
+_RE_WS = re.compile(r"\s+")
+
+# Guards existing_urls, which is shared by the fetch worker threads
+_urls_lock = threading.Lock()
 
 
 def load_feeds():
     with open(FEEDS_FILE) as f:
-        return yaml.safe_load(f)["feeds"]
+        return yaml.load(f, Loader=YAML_LOADER)["feeds"]
+
+
+def load_feed_cache():
+    """Return the stored url -> {etag, last_modified} validators."""
+    try:
+        return orjson.loads(FEED_CACHE_FILE.read_bytes())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_feed_cache(feed_cache):
+    FEED_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    FEED_CACHE_FILE.write_bytes(
+        orjson.dumps(feed_cache, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+    )
 
 
 def slugify(text):
     text = unescape(text)
-    text = re.sub(r"[^\w\s-]", "", text.lower())
-    text = re.sub(r"[-\s]+", "-", text).strip("-")
+    text = _RE_NONWORD.sub("", text.lower())
+    text = _RE_DASH.sub("-", text).strip("-")
     return text[:80]
 
 
 def article_id(url):
-    return hashlib.md5(url.encode()).hexdigest()[:12]
+    # Existing articles keep their md5-based ids: slugs are only derived
+    # for new URLs, and duplicates are detected by URL, not by id
+    return hashlib.blake2b(url.encode(), digest_size=6).hexdigest()
 
 
 def strip_html(text):
     if not text:
         return ""
-    text = re.sub(r"<[^>]+>", "", text)
+    text = _RE_TAG.sub("", text)
     text = unescape(text)
-    text = re.sub(r"\s+", " ", text).strip()
+    text = _RE_WS.sub(" ", text).strip()
     return text
 
 
-def get_existing_urls():
+def scan_article_urls():
     urls = set()
     for md_file in CONTENT_DIR.glob("*.md"):
         try:
-            post = frontmatter.load(md_file)
+            post = frontmatter.load(md_file, handler=YAML_HANDLER)
             if "url" in post.metadata:
                 urls.add(post.metadata["url"])
         except Exception:
@@ -73,31 +143,161 @@ def get_existing_urls():
     return urls
 
 
-def summarize_with_claude(title, description, source):
+def rebuild_url_index():
+    """Regenerate the URL index from the article files on disk."""
+    urls = scan_article_urls()
+    URL_INDEX_FILE.parent.mkdir(parents=True, exist_ok=True)
+    URL_INDEX_FILE.write_text("".join(f"{url}\n" for url in sorted(urls)))
+    return urls
+
+
+def append_to_url_index(urls):
+    URL_INDEX_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(URL_INDEX_FILE, "a") as f:
+        f.writelines(f"{url}\n" for url in urls)
+
+
+def get_existing_urls():
+    """Return the URLs of stored articles, read from the URL index.
+
+    The index is rebuilt from the markdown files when it is missing.
+    """
+    if not URL_INDEX_FILE.exists():
+        return rebuild_url_index()
+    return set(URL_INDEX_FILE.read_text().splitlines())
+
+
+def open_summary_cache():
+    SUMMARY_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(SUMMARY_CACHE_FILE)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS summaries ("
+        "key TEXT PRIMARY KEY, summary TEXT NOT NULL, model TEXT, ts INTEGER)"
+    )
+    return conn
+
+
+def summary_key(title, description, source):
+    raw = f"{PROMPT_VERSION}|{title}|{description}|{source}"
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def make_claude_client(api_key):
+    """Create the async client shared by every summary request in a run."""
+    http_client = anthropic.DefaultAsyncHttpxClient(
+        http2=HAS_HTTP2,
+        limits=httpx.Limits(
+            max_connections=2 * SUMMARY_CONCURRENCY,
+            max_keepalive_connections=2 * SUMMARY_CONCURRENCY,
+        ),
+    )
+    return anthropic.AsyncAnthropic(api_key=api_key, http_client=http_client)
+
+
+async def summarize_with_claude(client, semaphore, title, description, source):
+    async with semaphore:
+        try:
+            response = await client.messages.create(
+                model=SUMMARY_MODEL,
+                max_tokens=200,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": (
+                            f"Summarize this AI news article in 1-2 concise sentences "
+                            f"for a news aggregator. Be factual and specific.\n\n"
+                            f"Title: {title}\nSource: {source}\n"
+                            f"Description: {description[:1000]}"
+                        ),
+                    }
+                ],
+            )
+            return response.content[0].text.strip()
+        except Exception as e:
+            print(f"  Claude API error: {e}", file=sys.stderr)
+            return None
+
+
+def is_summary_length(description):
+    return (
+        SUMMARY_MIN_CHARS <= len(description) <= SUMMARY_MAX_CHARS
+        and description.count(". ") < SUMMARY_MAX_SENTENCES
+    )
+
+
+def summarize_articles(articles):
+    """Replace each article's description summary with a Claude summary.
+
+    Articles whose full description was already summary-sized (see
+    fetch_feed) are kept. Other summaries
+    are looked up in the on-disk cache first; the remaining requests share
+    one async client and run concurrently, capped at SUMMARY_CONCURRENCY
+    in flight. Articles keep their description when the API is
+    unavailable or a request fails.
+    """
     api_key = os.environ.get("ANTHROPIC_API_KEY")
     if not api_key or not HAS_ANTHROPIC:
-        return None
+        return
+    articles = [a for a in articles if a["needs_summary"]]
+    if not articles:
+        return
+
+    # Articles with identical inputs share a key and a single request
+    by_key = {}
+    for article in articles:
+        key = summary_key(article["title"], article["summary"], article["source"])
+        by_key.setdefault(key, []).append(article)
+
+    conn = open_summary_cache()
     try:
-        client = anthropic.Anthropic(api_key=api_key)
-        response = client.messages.create(
-            model="claude-sonnet-4-5-20250514",
-            max_tokens=200,
-            messages=[
-                {
-                    "role": "user",
-                    "content": (
-                        f"Summarize this AI news article in 1-2 concise sentences "
-                        f"for a news aggregator. Be factual and specific.\n\n"
-                        f"Title: {title}\nSource: {source}\n"
-                        f"Description: {description[:1000]}"
-                    ),
-                }
-            ],
+        summaries = {}
+        for key in by_key:
+            row = conn.execute(
+                "SELECT summary FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                summaries[key] = row[0]
+        pending = [key for key in by_key if key not in summaries]
+
+        async def run():
+            client = make_claude_client(api_key)
+            semaphore = asyncio.Semaphore(SUMMARY_CONCURRENCY)
+            try:
+                return await asyncio.gather(
+                    *(
+                        summarize_with_claude(
+                            client,
+                            semaphore,
+                            by_key[key][0]["title"],
+                            by_key[key][0]["summary"],
+                            by_key[key][0]["source"],
+                        )
+                        for key in pending
+                    )
+                )
+            finally:
+                await client.close()
+
+        print(
+            f"Summarizing {len(articles)} articles with Claude "
+            f"({len(summaries)} cached, {len(pending)} to request)"
         )
-        return response.content[0].text.strip()
-    except Exception as e:
-        print(f"  Claude API error: {e}", file=sys.stderr)
-        return None
+        if pending:
+            now = int(time.time())
+            fresh = {k: v for k, v in zip(pending, asyncio.run(run())) if v}
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?)",
+                    [(k, v, SUMMARY_MODEL, now) for k, v in fresh.items()],
+                )
+            summaries.update(fresh)
+    finally:
+        conn.close()
+
+    for key, summary in summaries.items():
+        for article in by_key[key]:
+            article["summary"] = summary
 
 
 def truncate_description(text, max_chars=300):
@@ -108,14 +308,29 @@ def truncate_description(text, max_chars=300):
     return truncated + "..."
 
 
-def fetch_feed(feed_config, existing_urls, cutoff_date):
+def fetch_feed(feed_config, existing_urls, cutoff_date, feed_cache):
     name = feed_config["name"]
     url = feed_config["url"]
     category = feed_config.get("category", "general")
 
     print(f"Fetching: {name}")
+    cached = feed_cache.get(url, {})
+    headers = {}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
     try:
-        parsed = feedparser.parse(url)
+        resp = SESSION.get(url, headers=headers, timeout=FETCH_TIMEOUT)
+        if resp.status_code == 304:
+            print(f"  Not modified: {name}")
+            return []
+        resp.raise_for_status()
+        # feedparser looks headers up by lowercase name, and takes the base
+        # URI for relative links from Content-Location when given bytes
+        response_headers = {k.lower(): v for k, v in resp.headers.items()}
+        response_headers.setdefault("content-location", resp.url)
+        parsed = feedparser.parse(resp.content, response_headers=response_headers)
     except Exception as e:
         print(f"  Error parsing {name}: {e}", file=sys.stderr)
         return []
@@ -124,15 +339,31 @@ def fetch_feed(feed_config, existing_urls, cutoff_date):
         print(f"  Warning: feed error for {name}: {parsed.bozo_exception}", file=sys.stderr)
         return []
 
+    # Remember validators so the next run can send a conditional request
+    validators = {
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+    }
+    if any(validators.values()):
+        feed_cache[url] = validators
+    else:
+        feed_cache.pop(url, None)
+
     articles = []
     for entry in parsed.entries:
         link = entry.get("link", "")
         if not link or link in existing_urls:
             continue
 
-        # Parse date
+        # Parse date; feedparser already normalizes known formats to UTC
+        # struct_time, so dateutil is only a fallback for the rest
+        date_parsed = entry.get("published_parsed") or entry.get("updated_parsed")
         date_str = entry.get("published") or entry.get("updated")
-        if date_str:
+        if date_parsed:
+            pub_date = datetime(*date_parsed[:6], tzinfo=timezone.utc)
+            if pub_date < cutoff_date:
+                continue
+        elif date_str:
             try:
                 pub_date = dateparser.parse(date_str)
                 if pub_date.tzinfo is None:
@@ -144,14 +375,18 @@ def fetch_feed(feed_config, existing_urls, cutoff_date):
         else:
             pub_date = datetime.now(timezone.utc)
 
+        # Claim the link so other feeds running concurrently skip it
+        with _urls_lock:
+            if link in existing_urls:
+                continue
+            existing_urls.add(link)
+
         title = strip_html(entry.get("title", "Untitled"))
         description = entry.get("summary") or entry.get("description") or ""
         description_clean = truncate_description(description)
-
-        # Try Claude summarization, fall back to description
-        summary = summarize_with_claude(title, description_clean, name)
-        if not summary:
-            summary = description_clean
+        # Judge the untruncated text: truncation can leave a short string
+        # that only looks summary-sized
+        needs_summary = not is_summary_length(strip_html(description))
 
         aid = article_id(link)
         slug = f"{pub_date.strftime('%Y-%m-%d')}-{slugify(title)}-{aid}"
@@ -162,11 +397,12 @@ def fetch_feed(feed_config, existing_urls, cutoff_date):
             "source": name,
             "category": category,
             "date": pub_date.strftime("%Y-%m-%dT%H:%M:%SZ"),
-            "summary": summary,
+            # Replaced by summarize_articles() when Claude is available
+            "summary": description_clean,
+            "needs_summary": needs_summary,
             "slug": slug,
         }
         articles.append(article)
-        existing_urls.add(link)
 
     print(f"  Found {len(articles)} new articles")
     return articles
@@ -189,19 +425,40 @@ def write_article(article):
     return filepath
 
 
-def main():
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument(
+        "--rebuild-index",
+        action="store_true",
+        help=f"regenerate {URL_INDEX_FILE.name} from the article files and exit",
+    )
+    args = arg_parser.parse_args(argv)
+    if args.rebuild_index:
+        urls = rebuild_url_index()
+        print(f"Indexed {len(urls)} article URLs in {URL_INDEX_FILE}")
+        return 0
+
     feeds = load_feeds()
     existing_urls = get_existing_urls()
+    feed_cache = load_feed_cache()
     cutoff_date = datetime.now(timezone.utc) - timedelta(days=7)
 
     total_new = 0
-    for feed_config in feeds:
-        articles = fetch_feed(feed_config, existing_urls, cutoff_date)
-        for article in articles:
-            path = write_article(article)
-            print(f"  Wrote: {path.name}")
-            total_new += 1
-
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_FETCH_WORKERS, len(feeds)))) as ex:
+        futures = [
+            ex.submit(fetch_feed, feed_config, existing_urls, cutoff_date, feed_cache)
+            for feed_config in feeds
+        ]
+        new_articles = [a for future in as_completed(futures) for a in future.result()]
+
+    summarize_articles(new_articles)
+    for article in new_articles:
+        path = write_article(article)
+        print(f"  Wrote: {path.name}")
+        total_new += 1
+    append_to_url_index(a["url"] for a in new_articles)
+
+    save_feed_cache(feed_cache)
     print(f"\nDone. {total_new} new articles fetched.")
     return total_new
 